@@ -0,0 +1,69 @@
+"""Compare a full walk with learned `Layout`s on wide pages.
+
+Usage: python bench/layout_probe.py [repeat]
+"""
+import pathlib
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+
+import lxml.html
+
+import tmst
+
+
+TEMPLATES = (
+    '<div class="card" id:{ids} />',
+    '<div class="card featured" data-rank:{ranks} />',
+    '<a class="link" href:{links} />',
+)
+
+
+def make_page(cards: int) -> lxml.html.HtmlElement:
+    rows = "\n".join(
+        '<div class="card{}" id="c{}" data-rank="{}"><a class="link"'
+        ' href="/{}">more</a></div>'.format(
+            " featured" if i % 4 == 0 else "", i, i % 10, i)
+        for i in range(cards))
+    return lxml.html.fromstring(
+        "<html><body>\n{}\n</body></html>".format(rows))
+
+
+def timed(capture, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        capture()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(repeat: int):
+    parsers = [tmst.compile(x) for x in TEMPLATES]
+
+    print("  cards  full walk   verified    trusted")
+    for cards in (1500, 3000, 6000):
+        learn_from, dom = make_page(cards), make_page(cards)
+
+        def full():
+            return [p.capture_from(dom) for p in parsers]
+
+        def learned(trusted: bool):
+            layouts = [tmst.toolbox.Layout(trusted) for _ in parsers]
+            for parser, layout in zip(parsers, layouts):
+                parser.capture_from(learn_from, layout=layout)
+
+            def capture():
+                return [p.capture_from(dom, layout=x)
+                        for p, x in zip(parsers, layouts)]
+
+            assert capture() == full(), "learned layout must match a full walk"
+            return timed(capture, repeat)
+
+        full_time = timed(full, repeat)
+        print("{:>7}  {:>8.3f}s".format(cards, full_time), *(
+            " {:.3f}s {:.1f}x".format(x, full_time / x)
+            for x in (learned(False), learned(True))))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
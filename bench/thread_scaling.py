@@ -0,0 +1,48 @@
+"""Measure how `ThreadedCapture` scales from 1 to N threads.
+
+Usage: python bench/thread_scaling.py [max_threads] [documents]
+"""
+import os
+import pathlib
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tmst
+
+
+TEMPLATE = '<input class="item" value:{captured_values} />'
+
+
+def make_document(items: int) -> str:
+    rows = "\n".join(
+        '<li><input class="item{}" value="v{}" /></li>'
+        .format(" bigger" if i % 3 else "", i) for i in range(items))
+    return "<html><body><ul>\n{}\n</ul></body></html>".format(rows)
+
+
+def run(capture: tmst.executor.ThreadedCapture, sources: list) -> float:
+    start = time.perf_counter()
+    for _ in capture.capture_all(sources):
+        pass
+    return time.perf_counter() - start
+
+
+def main(max_threads: int, documents: int):
+    parser = tmst.compile(TEMPLATE)
+    sources = [make_document(200)] * documents
+
+    print("threads  seconds  docs/s  speedup")
+    baseline = None
+    for workers in range(1, max_threads + 1):
+        elapsed = run(tmst.executor.ThreadedCapture(parser, workers), sources)
+        baseline = baseline or elapsed
+        print("{:>7}  {:>7.3f}  {:>6.0f}  {:>6.2f}x".format(
+            workers, elapsed, documents / elapsed, baseline / elapsed))
+
+
+if __name__ == "__main__":
+    max_threads = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    documents = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    main(max_threads, documents)
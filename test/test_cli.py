@@ -0,0 +1,120 @@
+import contextlib
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+import fix_import
+from tmst import __main__ as cli
+
+
+class TestCommandLine(unittest.TestCase):
+    casedir = pathlib.Path(__file__).resolve().parent / "capture_cases"
+
+    template = str(casedir / "input_with_item_class.template")
+
+    def run_cli(self, *argv, stdin: str="") -> (int, list):
+        self.stderr = io.StringIO()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = str(pathlib.Path(tmpdir) / "output.ndjson")
+            with contextlib.redirect_stderr(self.stderr), \
+                    unittest.mock.patch("sys.stdin", io.StringIO(stdin)):
+                code = cli.main(list(argv) + ["-o", output, "-j", "2"])
+            with open(output, "r") as ifile:
+                return code, [json.loads(line) for line in ifile]
+
+    def test_capture_directory(self):
+        template = self.template
+        code, records = self.run_cli("-t", template, str(self.casedir))
+
+        self.assertEqual(code, 0)
+        captures = {pathlib.Path(x["source"]).name: x["captures"][template]
+                    for x in records}
+        self.assertEqual(captures["list_of_inputs.html"],
+                         {"captured_values": ["aaa", "ccc", "ddd"]})
+        self.assertEqual(captures["tailwind_cards.html"], {})
+
+    def test_missing_file_is_reported(self):
+        template = self.template
+        missing = str(self.casedir / "missing.html")
+        code, records = self.run_cli("-t", template, missing)
+
+        self.assertEqual(code, 1)
+        self.assertEqual(records[0]["source"], missing)
+        self.assertIn("FileNotFoundError", records[0]["error"])
+
+    def test_capture_files_listed_on_stdin(self):
+        source = str(self.casedir / "list_of_inputs.html")
+        code, records = self.run_cli("-t", self.template, "-",
+                                     stdin="\n{}\n\n".format(source))
+
+        self.assertEqual(code, 0)
+        self.assertEqual(records, [{
+            "source": source,
+            "captures": {self.template: {"captured_values": [
+                "aaa", "ccc", "ddd"]}}}])
+
+    def test_report_is_printed_on_stderr(self):
+        self.run_cli("-t", self.template, str(self.casedir / "*.html"))
+
+        report = self.stderr.getvalue()
+        self.assertIn("2 documents in", report)
+        self.assertIn("0 error(s)", report)
+        self.assertIn("latency ms: p50", report)
+
+    def test_empty_sources_are_reported(self):
+        with tempfile.TemporaryDirectory() as emptydir:
+            pattern = str(self.casedir / "*.nothing")
+            code, records = self.run_cli("-t", self.template, emptydir,
+                                         pattern, "-")
+
+        self.assertEqual(code, 1)
+        self.assertEqual([x["source"] for x in records],
+                         [emptydir, pattern, "-"])
+        self.assertTrue(all("error" in x for x in records))
+
+    def assertUsageError(self, *argv):
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(SystemExit) as raised:
+                cli.main(list(argv) + ["-"])
+        self.assertEqual(raised.exception.code, 2)
+        return stderr.getvalue().splitlines()[-1]
+
+    def test_missing_template_is_a_usage_error(self):
+        message = self.assertUsageError("-t", "missing.template")
+        self.assertIn("cannot read template missing.template", message)
+
+    def test_malformed_template_is_a_usage_error(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            template = str(pathlib.Path(tmpdir) / "bad.template")
+            with open(template, "w") as ofile:
+                ofile.write("<a href:{x}")
+            message = self.assertUsageError("-t", template)
+        self.assertIn("invalid template {} at 0:10".format(template), message)
+
+    def test_template_given_twice_is_a_usage_error(self):
+        same = str(self.casedir / ".." / "capture_cases"
+                   / "input_with_item_class.template")
+        message = self.assertUsageError("-t", self.template, "-t", same)
+        self.assertIn("given twice", message)
+
+    def test_workers_must_be_positive(self):
+        for workers in ("0", "-2"):
+            with contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit) as raised:
+                    cli.parse_args(["-t", self.template, "-j", workers, "-"])
+            self.assertEqual(raised.exception.code, 2)
+
+    def test_percentile_is_nearest_rank(self):
+        self.assertEqual(cli.percentile([1, 2], 0.5), 1)
+        self.assertEqual(cli.percentile([7], 0.99), 7)
+        values = list(range(1, 101))
+        self.assertEqual(cli.percentile(values, 0.5), 50)
+        self.assertEqual(cli.percentile(values, 0.99), 99)
+        self.assertEqual(cli.percentile(values, 1.0), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import concurrent.futures
+import threading
+import unittest
+
+import fix_import
+import tmst
+
+
+class TestExecutor(unittest.TestCase):
+    def test_html_parser_is_reused_within_a_thread(self):
+        self.assertIs(tmst.executor.html_parser(),
+                      tmst.executor.html_parser())
+
+    def test_html_parser_is_not_shared_between_threads(self):
+        parsers = {}
+        barrier = threading.Barrier(4)
+
+        def record(name):
+            # wait for every thread, so none of them can be reused
+            barrier.wait()
+            parsers[name] = (tmst.executor.html_parser(),
+                             tmst.executor.html_parser())
+
+        threads = [threading.Thread(target=record, args=(i, ))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(a is b for a, b in parsers.values()))
+        owned = [a for a, _ in parsers.values()]
+        owned.append(tmst.executor.html_parser())
+        self.assertEqual(len(set(map(id, owned))), 5)
+
+    def test_capture_all_preserves_order(self):
+        parser = tmst.compile('<input value:{values} />')
+        sources = ['<div><input value="{}" /></div>'.format(i)
+                   for i in range(50)]
+
+        capture = tmst.executor.ThreadedCapture(parser, workers=4)
+        self.assertEqual(list(capture.capture_all(sources)),
+                         [{"values": [str(i)]} for i in range(50)])
+
+    def test_sources_are_read_lazily(self):
+        read = []
+
+        def sources():
+            for i in range(100):
+                read.append(i)
+                yield i
+
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            results = tmst.executor.map_bounded(pool, lambda x: x * 2,
+                                                sources(), window=4)
+            self.assertEqual(next(results), 0)
+            self.assertLessEqual(len(read), 5)
+            self.assertEqual(list(results), [x * 2 for x in range(1, 100)])
+
+
+if __name__ == "__main__":
+    unittest.main()
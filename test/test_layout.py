@@ -0,0 +1,93 @@
+import unittest
+import lxml.html
+
+import fix_import
+import tmst
+
+
+TEMPLATE = """
+<li class="item" id:{ids} />
+<input class="item" value:{values} />
+"""
+
+
+def page(*items: str, wrapped: bool=False,
+         skipped: str="") -> lxml.html.HtmlElement:
+    rows = "".join('<li class="item" id="{0}"><input class="item" value="{0}"'
+                   ' /></li><li class="{1}" id="skip" />'.format(x, skipped)
+                   for x in items)
+    if wrapped:
+        rows = "<div>{}</div>".format(rows)
+    return lxml.html.fromstring(
+        "<html><body><ul>{}</ul></body></html>".format(rows))
+
+
+class TestLayout(unittest.TestCase):
+    def setUp(self):
+        self.parser = tmst.compile(TEMPLATE)
+        self.layout = tmst.toolbox.Layout()
+
+    def capture(self, dom: lxml.html.HtmlElement) -> dict:
+        return self.parser.capture_from(dom, layout=self.layout)
+
+    def assertFullScan(self, dom: lxml.html.HtmlElement):
+        self.assertEqual(self.capture(dom), self.parser.capture_from(dom))
+
+    def test_probe_hits_give_full_scan_result(self):
+        self.capture(page("a", "b", "c"))
+        dom = page("d", "e", "f")
+
+        self.assertFullScan(dom)
+        self.assertEqual(self.capture(dom),
+                         {"ids": ["d", "e", "f"], "values": ["d", "e", "f"]})
+        self.assertEqual((self.layout.hits, self.layout.misses), (2, 1))
+
+    def test_drifted_page_is_relearned(self):
+        self.capture(page("a", "b"))
+        dom = page("c", "d", wrapped=True)
+
+        self.assertFullScan(dom)
+        self.assertEqual((self.layout.hits, self.layout.misses), (0, 2))
+
+        # the new layout is used on the next page with the same structure
+        self.assertFullScan(page("e", "f", wrapped=True))
+        self.assertEqual((self.layout.hits, self.layout.misses), (1, 2))
+
+    def test_shorter_page_is_relearned(self):
+        self.capture(page("a", "b", "c"))
+        dom = page("d")
+
+        self.assertFullScan(dom)
+        self.assertEqual((self.layout.hits, self.layout.misses), (0, 2))
+
+    def test_match_outside_of_learned_paths_is_captured(self):
+        self.capture(page("a", "b"))
+
+        self.assertFullScan(page("c", "d", "e"))
+        self.assertEqual((self.layout.hits, self.layout.misses), (0, 2))
+
+    def test_new_match_on_learned_structure_is_captured(self):
+        self.capture(page("a", "b"))
+        dom = page("c", "d", skipped="item")
+
+        self.assertFullScan(dom)
+        self.assertEqual(self.capture(dom)["ids"], ["c", "skip", "d", "skip"])
+
+    def test_trusted_layout_misses_match_outside_of_learned_paths(self):
+        self.layout = tmst.toolbox.Layout(trusted=True)
+        self.capture(page("a", "b"))
+
+        self.assertEqual(self.capture(page("c", "d", "e")),
+                         {"ids": ["c", "d"], "values": ["c", "d"]})
+        self.assertEqual((self.layout.hits, self.layout.misses), (1, 1))
+
+    def test_layout_belongs_to_one_parser(self):
+        self.capture(page("a"))
+        other = tmst.compile('<li class="item" id:{ids} />')
+
+        with self.assertRaises(ValueError):
+            other.capture_from(page("b"), layout=self.layout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,4 @@
-from tmst import mimetic
+from tmst import executor, mimetic
 from tmst.parser import toolbox
 from tmst.template import syntax
 
@@ -0,0 +1,180 @@
+import argparse
+import concurrent.futures
+import glob
+import json
+import math
+import os
+import pathlib
+import sys
+import time
+
+import tmst
+from tmst.template import syntax
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            "expected a positive number, not {}".format(value))
+    return number
+
+
+def argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m tmst",
+        description="Capture data from HTML files with TMST templates.")
+    parser.add_argument(
+        "-t", "--template", dest="templates", action="append", required=True,
+        help="template file, can be given many times")
+    parser.add_argument(
+        "sources", nargs="+",
+        help="HTML file, directory, glob pattern, or '-' to read a list of"
+             " file names from stdin")
+    parser.add_argument(
+        "-j", "--workers", type=positive_int, default=os.cpu_count(),
+        help="number of capturing threads (default: %(default)s)")
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="NDJSON output file (default: stdout)")
+    return parser
+
+
+def parse_args(argv: [None, list]=None):
+    return argument_parser().parse_args(argv)
+
+
+def discover(sources: list, empty: list, stdin=None) -> iter:
+    """Yield the HTML file names given as files, directories or globs.
+
+    Sources which give no file at all are appended to `empty`.
+    """
+    for source in sources:
+        if source == "-":
+            lines = (line.strip() for line in (stdin or sys.stdin))
+            filenames = (line for line in lines if line)
+        elif pathlib.Path(source).is_dir():
+            filenames = sorted(
+                str(path) for path in pathlib.Path(source).rglob("*")
+                if path.suffix in (".html", ".htm") and path.is_file())
+        elif glob.has_magic(source):
+            filenames = sorted(glob.glob(source, recursive=True))
+        else:
+            filenames = (source, )
+
+        found = False
+        for filename in filenames:
+            found = True
+            yield filename
+        if not found:
+            empty.append(source)
+
+
+class TemplateError(Exception):
+    pass
+
+
+def compile_templates(filenames: list) -> dict:
+    """Compile each template, keyed by its file name as given."""
+    parsers = {}
+    seen = {}
+    for filename in filenames:
+        resolved = pathlib.Path(filename).resolve()
+        if resolved in seen:
+            raise TemplateError("template {} given twice (as {})"
+                                .format(filename, seen[resolved]))
+        seen[resolved] = filename
+
+        try:
+            with open(filename, "r") as ifile:
+                source = ifile.read()
+        except OSError as exc:
+            raise TemplateError("cannot read template {}: {}"
+                                .format(filename, exc.strerror or exc))
+
+        try:
+            parsers[filename] = tmst.compile(source)
+        except syntax.PatternSyntaxError as exc:
+            raise TemplateError("invalid template {} at {}: {}"
+                                .format(filename, exc.pos, exc))
+        except AssertionError as exc:
+            # unsupported constructs are still asserted by the compiler
+            raise TemplateError("unsupported template {}: {}"
+                                .format(filename, exc))
+    return parsers
+
+
+def capture(filename: str, parsers: dict) -> (dict, float):
+    """Capture one file with every template, also return the time spent."""
+    start = time.perf_counter()
+    record = {"source": filename}
+    try:
+        with open(filename, "rb") as ifile:
+            dom = tmst.executor.parse(ifile.read())
+        record["captures"] = {name: parser.capture_from(dom)
+                              for name, parser in parsers.items()}
+    except Exception as exc:
+        record["error"] = "{}: {}".format(type(exc).__name__, exc)
+    return record, time.perf_counter() - start
+
+
+def percentile(sorted_values: list, ratio: float) -> float:
+    """Return the nearest-rank percentile of non-empty sorted values."""
+    index = max(0, math.ceil(ratio * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def report(latencies: list, elapsed: float, errors: int, stream=None):
+    stream = stream or sys.stderr
+    count = len(latencies)
+    print("{} documents in {:.3f}s ({:.1f} docs/s), {} error(s)".format(
+        count, elapsed, count / elapsed if elapsed else 0.0, errors),
+        file=stream)
+
+    if latencies:
+        latencies = sorted(latencies)
+        print("latency ms: p50 {:.2f}, p90 {:.2f}, p99 {:.2f}, max {:.2f}"
+              .format(*(1000 * percentile(latencies, ratio)
+                        for ratio in (0.5, 0.9, 0.99, 1.0))),
+              file=stream)
+
+
+def main(argv: [None, list]=None) -> int:
+    arguments = argument_parser()
+    args = arguments.parse_args(argv)
+    try:
+        parsers = compile_templates(args.templates)
+    except TemplateError as exc:
+        arguments.error(str(exc))
+
+    output = (sys.stdout if args.output == "-"
+              else open(args.output, "w", encoding="utf-8"))
+
+    latencies = []
+    errors = 0
+    empty = []
+    start = time.perf_counter()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(args.workers) as pool:
+            work = tmst.executor.map_bounded(
+                pool, lambda filename: capture(filename, parsers),
+                discover(args.sources, empty), window=2 * args.workers)
+            for record, latency in work:
+                output.write(json.dumps(record) + "\n")
+                latencies.append(latency)
+                errors += "error" in record
+
+        for source in empty:
+            record = {"source": source, "error": "no HTML file found"}
+            output.write(json.dumps(record) + "\n")
+            errors += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    report(latencies, time.perf_counter() - start, errors)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import collections
+import concurrent.futures
+import os
+import threading
+
+import lxml.html
+
+from tmst.parser import toolbox
+
+
+_local = threading.local()
+
+
+def html_parser() -> lxml.html.HTMLParser:
+    """Return the lxml HTML parser owned by the calling thread.
+
+    lxml parser objects must not be shared between threads, so every thread
+    lazily builds its own and reuses it for all the documents it reads.
+    """
+    parser = getattr(_local, "html_parser", None)
+    if parser is None:
+        parser = lxml.html.HTMLParser()
+        _local.html_parser = parser
+    return parser
+
+
+def parse(source: [str, bytes]) -> lxml.html.HtmlElement:
+    """Parse an HTML document with the parser of the calling thread."""
+    return lxml.html.fromstring(source, parser=html_parser())
+
+
+def map_bounded(pool: concurrent.futures.Executor, func, items: iter,
+                window: int) -> iter:
+    """Like `pool.map`, with at most `window` calls submitted at once.
+
+    Items are read lazily, and each result is yielded, in order, as soon as
+    the oldest pending call is done.
+    """
+    pending = collections.deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(func, item))
+
+    while pending:
+        yield pending.popleft().result()
+
+
+class ThreadedCapture:
+    """Capture many HTML documents with a pool of threads.
+
+    The compiled `toolbox.Parser` is shared by all threads and only read
+    while capturing, each capture writing into its own storage. Each thread
+    parses documents with its own lxml parser (see `html_parser`).
+
+    This gives thread safety without a lock, not throughput: lxml releases
+    the GIL while parsing, but the matching is a Python walk of the tree
+    that holds it, so more threads do not capture faster.
+    """
+
+    def __init__(self, parser: toolbox.Parser, workers: int=None):
+        self.parser = parser
+        self.workers = os.cpu_count() if workers is None else workers
+
+    def capture(self, source: [str, bytes]) -> dict:
+        return self.parser.capture_from(parse(source))
+
+    def capture_all(self, sources: iter) -> iter:
+        """Yield the captured data of each source, in the given order."""
+        with concurrent.futures.ThreadPoolExecutor(self.workers) as pool:
+            yield from map_bounded(pool, self.capture, sources,
+                                   window=2 * self.workers)
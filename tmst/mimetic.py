@@ -4,13 +4,19 @@ from tmst.template import syntax, ast
 
 
 def generate_parser(ast_elements: iter) -> toolbox.Parser:
-    root = toolbox.Parser()
+    ast_elements = tuple(ast_elements)
+    root = toolbox.Parser(toolbox.ClassTokens(
+        token
+        for element in ast_elements
+        for attr in element.attributes
+        if str(attr.name) == "class" and attr.value
+        for token in attr.value.split()))
 
     for token in ast_elements:
         assert isinstance(token, ast.OpenTag), "only OpenTag supported"
         assert token.auto_close, "only auto-closing tag supported"
 
-        opentag_parser = toolbox.Parser()
+        opentag_parser = toolbox.Parser(root.class_tokens)
 
         if token.name:
             cond = toolbox.match_tag_name(str(token.name))
@@ -23,7 +29,8 @@ def generate_parser(ast_elements: iter) -> toolbox.Parser:
                 opentag_parser.capturing_net.append(extractor)
 
             if attr.value:
-                cond = toolbox.match_attr(str(attr.name), attr.value)
+                cond = toolbox.match_attr(str(attr.name), attr.value,
+                                          root.class_tokens)
                 opentag_parser.filters.append(cond)
 
         if not opentag_parser.is_empty():
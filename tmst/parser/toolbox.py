@@ -3,17 +3,75 @@ import lxml.html
 from tmst.template import ast
 
 
+class ClassTokens:
+    """Integer id, as a single bit, of each class token used by a template.
+
+    The table is built once when the template is compiled, and only read
+    while capturing.
+    """
+
+    def __init__(self, tokens: iter=()):
+        self.bits = {}
+        for token in tokens:
+            self.bits.setdefault(token, 1 << len(self.bits))
+
+    def require(self, tokens: (str, )) -> int:
+        """Return the mask of the given tokens, all known by the table."""
+        mask = 0
+        for token in tokens:
+            assert token in self.bits, (
+                "class \"{}\" is unknown to the template".format(token))
+            mask |= self.bits[token]
+        return mask
+
+    def mask(self, rawclasses: str) -> int:
+        """Return the mask of the known tokens of a `class` attribute."""
+        bits = self.bits
+        mask = 0
+        for token in rawclasses.split():
+            mask |= bits.get(token, 0)
+        return mask
+
+
+class ClassIndex:
+    """Per-document cache of the `class` attribute of each element.
+
+    The attribute is read and split at most once per element.
+    """
+
+    def __init__(self, tokens: ClassTokens):
+        self.tokens = tokens
+        self.entries = {}
+
+    def entry(self, dom: lxml.html.HtmlElement) -> (str, int):
+        entry = self.entries.get(dom)
+        if entry is None:
+            raw = dom.get("class")
+            entry = (raw, self.tokens.mask(raw) if raw else 0)
+            # keeping the element as key also keeps its lxml proxy alive
+            self.entries[dom] = entry
+        return entry
+
+    def raw(self, dom: lxml.html.HtmlElement) -> [None, str]:
+        return self.entry(dom)[0]
+
+    def mask(self, dom: lxml.html.HtmlElement) -> int:
+        return self.entry(dom)[1]
+
+
 class match_tag_name:
     def __init__(self, name: ast.Identifier):
         self.name = str(name)
 
-    def __call__(self, dom: lxml.html.HtmlElement) -> bool:
+    def __call__(self, dom: lxml.html.HtmlElement, classes: ClassIndex) -> bool:
         return dom.tag == self.name
 
 
-def match_attr(name: ast.Identifier, value: ast.IdentifierPath):
-    class_ = MatchClassAttribute if str(name) == "class" else MatchPlainAttribute
-    return class_(name, value)
+def match_attr(name: ast.Identifier, value: ast.IdentifierPath,
+               tokens: ClassTokens):
+    if str(name) == "class":
+        return MatchClassAttribute(name, value, tokens)
+    return MatchPlainAttribute(name, value)
 
 
 class MatchPlainAttribute:
@@ -23,17 +81,18 @@ class MatchPlainAttribute:
         assert bool(self.value), ("nothing to match for \"{}\" attribute"
                                   .format(self.name))
 
-    def __call__(self, dom: lxml.html.HtmlElement) -> bool:
+    def __call__(self, dom: lxml.html.HtmlElement, classes: ClassIndex) -> bool:
         return dom.attrib.get(self.name, None) == self.value
 
 
 class MatchClassAttribute:
-    def __init__(self, _, rawclasses: str):
+    def __init__(self, _, rawclasses: str, tokens: ClassTokens):
         self.classes = tuple(x.strip() for x in rawclasses.split())
         assert bool(self.classes), "nothing to match for \"class\" attribute"
+        self.mask = tokens.require(self.classes)
 
-    def __call__(self, dom: lxml.html.HtmlElement) -> bool:
-        return all(x in dom.classes for x in self.classes)
+    def __call__(self, dom: lxml.html.HtmlElement, classes: ClassIndex) -> bool:
+        return classes.mask(dom) & self.mask == self.mask
 
 
 class capture_attr:
@@ -42,21 +101,24 @@ class capture_attr:
         self.hook = (self.fetch_class if self.name == "class" else self.fetch_any)
         self.capture_name = capture_name
 
-    def fetch_class(self, dom):
-        return dom.get("class")
+    def fetch_class(self, dom, classes):
+        return classes.raw(dom)
 
-    def fetch_any(self, dom):
+    def fetch_any(self, dom, classes):
         return dom.attrib.get(self.name)
 
-    def __call__(self, dom: lxml.html.HtmlElement, storage: dict):
+    def __call__(self, dom: lxml.html.HtmlElement, storage: dict,
+                 classes: ClassIndex):
         val_storage = storage.get(str(self.capture_name), [])
-        val_storage.append(self.hook(dom))
+        val_storage.append(self.hook(dom, classes))
         storage[str(self.capture_name)] = val_storage
 
 
 class Parser:
-    def __init__(self):
+    def __init__(self, class_tokens: ClassTokens=None):
         self._is_root = False
+        self.class_tokens = (ClassTokens() if class_tokens is None
+                             else class_tokens)
         self.filters = []
         self.capturing_net = []
         self.subs = []
@@ -67,31 +129,170 @@ class Parser:
     def is_empty(self) -> bool:
         return not bool(self.filters) and not bool(self.capturing_net)
 
-    def match(self, dom: lxml.html.HtmlElement) -> bool:
-        return not bool(self.filters) or all(f(dom) for f in self.filters)
+    def match(self, dom: lxml.html.HtmlElement, classes: ClassIndex) -> bool:
+        return (not bool(self.filters)
+                or all(f(dom, classes) for f in self.filters))
 
-    def capture(self, dom: lxml.html.HtmlElement, storage: dict):
+    def capture(self, dom: lxml.html.HtmlElement, storage: dict,
+                classes: ClassIndex):
         for tool in self.capturing_net:
-            tool(dom, storage)
+            tool(dom, storage, classes)
+
+    def candidates(self, dom: lxml.html.HtmlElement) -> iter:
+        """Iterate over the descendants of `dom` with the right tag name."""
+        tags = [f.name for f in self.filters if isinstance(f, match_tag_name)]
+        return dom.iterdescendants(*tags[:1])
 
-    def capture_from(self, dom: lxml.html.HtmlElement):
+    def capture_from(self, dom: lxml.html.HtmlElement, layout: "Layout"=None):
         data = {}
-        self._dig(dom, storage=data)
+        classes = ClassIndex(self.class_tokens)
+        if layout is None:
+            self._dig(dom, storage=data, classes=classes)
+        else:
+            self._dig_along(dom, layout, storage=data, classes=classes)
         return data
 
-    def _dig(self, dom: lxml.html.HtmlElement, storage: dict):
+    def _dig(self, dom: lxml.html.HtmlElement, storage: dict,
+             classes: ClassIndex, trail: list=None):
         stack = []
-        stack.extend(dom.getchildren())
+        stack.extend(_located_children(dom, () if trail is not None else None))
 
         while stack:
-            root = stack.pop(0)
+            root, path = stack.pop(0)
 
             subtree_read = False
-            for child in self.subs:
-                if child.match(root):
-                    child.capture(root, storage)
+            for index, child in enumerate(self.subs):
+                if child.match(root, classes):
+                    if trail is not None:
+                        trail.append((path, index))
+                    child.capture(root, storage, classes)
                     if child.has_subs():
-                        child._dig(root, storage)
+                        child._dig(root, storage, classes)
 
             if not subtree_read:
-                stack.extend(root.getchildren())
+                stack.extend(_located_children(root, path))
+
+    def _dig_along(self, dom: lxml.html.HtmlElement, layout: "Layout",
+                   storage: dict, classes: ClassIndex):
+        if layout.owner is not None and layout.owner is not self:
+            raise ValueError("layout learned by another parser,"
+                             " use one layout per parser")
+
+        found = layout.probe(dom)
+        if (found is not None
+                and all(self.subs[index].match(root, classes)
+                        for root, index in found)
+                and (layout.trusted
+                     or self._count_matches(dom, classes) == layout.counts)):
+            layout.hits += 1
+            for root, index in found:
+                child = self.subs[index]
+                child.capture(root, storage, classes)
+                if child.has_subs():
+                    child._dig(root, storage, classes)
+            return
+
+        trail = []
+        self._dig(dom, storage, classes, trail=trail)
+        layout.misses += 1
+        layout.learn(self, trail)
+
+    def _count_matches(self, dom: lxml.html.HtmlElement,
+                       classes: ClassIndex) -> list:
+        return [sum(1 for root in child.candidates(dom)
+                    if child.match(root, classes))
+                for child in self.subs]
+
+
+def _located_children(dom: lxml.html.HtmlElement, path: [None, tuple]):
+    if path is None:
+        return ((child, None) for child in dom)
+    return ((child, path + ((child.tag, pos), ))
+            for pos, child in enumerate(dom))
+
+
+class _LayoutNode:
+    def __init__(self):
+        self.slots = []
+        self.children = {}
+        self.last = -1
+
+
+class Layout:
+    """Where the sub-parsers of a parser matched on the previous pages.
+
+    Each match is recorded as a path of (tag, position) pairs from the
+    captured element. Pages sharing a template structure are probed on those
+    paths, and fully walked when the layout drifted, the layout being learned
+    again from that walk.
+
+    Probes are verified by counting the elements matched by each sub-parser
+    over the whole page, which must be the number of learned matches: the
+    result is always the one of a full walk. With `trusted`, this count is
+    skipped and a match outside of the learned paths, like an extra item on
+    a longer page, is not captured.
+
+    A layout belongs to the first parser it is used with, and is updated by
+    each capture: do not share it between parsers nor threads.
+    """
+
+    def __init__(self, trusted: bool=False):
+        self.trusted = trusted
+        self.owner = None
+        self.trail = []
+        self.counts = []
+        self.tree = None
+        self.hits = 0
+        self.misses = 0
+
+    def learn(self, parser: Parser, trail: list):
+        """Record the (path, sub-parser index) matches of a full walk."""
+        self.owner = parser
+        self.trail = trail
+        self.counts = [0] * len(parser.subs)
+        for _, index in trail:
+            self.counts[index] += 1
+
+        self.tree = None
+        if not trail:
+            return
+
+        # group the paths by prefix, so probing reads each children list once
+        self.tree = _LayoutNode()
+        for slot, (path, _) in enumerate(trail):
+            node = self.tree
+            for tag, pos in path:
+                step = node.children.get(pos)
+                if step is None:
+                    step = node.children[pos] = (tag, _LayoutNode())
+                    node.last = max(node.last, pos)
+                node = step[1]
+            node.slots.append(slot)
+
+    def probe(self, dom: lxml.html.HtmlElement) -> [None, list]:
+        """Return the (element, sub-parser index) found on learned paths."""
+        if self.tree is None:
+            return None
+
+        found = [None] * len(self.trail)
+        if not self._visit(dom, self.tree, found):
+            return None
+        return found
+
+    def _visit(self, dom: lxml.html.HtmlElement, node: _LayoutNode,
+               found: list) -> bool:
+        for slot in node.slots:
+            found[slot] = (dom, self.trail[slot][1])
+
+        if not node.children:
+            return True
+
+        for pos, child in enumerate(dom):
+            step = node.children.get(pos)
+            if step is not None:
+                tag, sub = step
+                if child.tag != tag or not self._visit(child, sub, found):
+                    return False
+                if pos == node.last:
+                    return True
+        return False
@@ -86,7 +86,7 @@ class Reader:
         tuple(itertools.takewhile(skip, self.source))
 
     def match_then_skip_ws(self, context: str):
-        if not self.source.curr.isspace():
+        if not self.source.curr_str.isspace():
             self.raise_error("expected whitespace " + context)
         self.source.next()
 
@@ -105,7 +105,7 @@ class Reader:
         self.source.next()
 
     def next_identifier(self):
-        if not self.source.curr.isalpha():
+        if not self.source.curr_str.isalpha():
             return ast.Identifier()
 
         def valid(t: str):